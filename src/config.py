@@ -3,6 +3,8 @@ Configuration settings for the Policy Analysis API
 """
 
 import os
+from dataclasses import make_dataclass
+from pathlib import Path
 from typing import List
 from pydantic_settings import BaseSettings
 
@@ -17,13 +19,22 @@ class Settings(BaseSettings):
     ANTHROPIC_API_KEY: str = ""
     WEBHOOK_SECRET: str = ""
 
-        # Supabase
-        SUPABASE_URL: str = ""
+    # Supabase
+    SUPABASE_URL: str = ""
     SUPABASE_KEY: str = ""
 
     # Service URLs
     CALLBACK_TIMEOUT: int = 30  # seconds
 
+    # Concurrency
+    MAX_CONCURRENT_ANALYSES: int = 4
+
+    # Status store (Redis; falls back to in-memory when unset)
+    REDIS_URL: str = ""
+    STATUS_TTL_SECONDS: int = 86400  # 24 hours
+    STATUS_STORE_MAX_ENTRIES: int = 10000  # In-memory fallback cap
+    ANALYSIS_CACHE_TTL_SECONDS: int = 7 * 86400  # Reuse analyses of identical policy text
+
     # Storage
     TEMP_DIR: str = "temp"
     REPORTS_DIR: str = "reports"
@@ -31,6 +42,14 @@ class Settings(BaseSettings):
     # Claude API Settings
     CLAUDE_MODEL: str = "claude-sonnet-4-20250514"
     CLAUDE_MAX_TOKENS: int = 8192
+    CLAUDE_MAX_INPUT_CHARS: int = 600000  # ~150K tokens of policy text
+    CLAUDE_PARALLEL_SECTIONS: bool = False  # Split each analysis into 3 concurrent requests
+
+    # Claude Message Batches (opt-in: ~50% cheaper, minutes-to-hours latency)
+    CLAUDE_BATCH_ENABLED: bool = False
+    CLAUDE_BATCH_WINDOW_MS: int = 500
+    CLAUDE_BATCH_MAX_SIZE: int = 50
+    CLAUDE_BATCH_POLL_INTERVAL: int = 30  # seconds
 
     # CORS
     CORS_ORIGINS: List[str] = ["*"]
@@ -48,4 +67,17 @@ class Settings(BaseSettings):
         env_file_encoding = "utf-8"
 
 
-settings = Settings()
+# Pydantic validates the environment once; the app then reads a frozen,
+# slotted copy so attribute access skips BaseSettings' descriptor machinery.
+FrozenSettings = make_dataclass(
+    "FrozenSettings",
+    [(name, field.annotation) for name, field in Settings.model_fields.items()],
+    frozen=True,
+    slots=True,
+)
+
+settings = FrozenSettings(**Settings().model_dump())
+
+# Resolved storage paths (directories are created once at startup)
+TEMP_PATH = Path(settings.TEMP_DIR)
+REPORTS_PATH = Path(settings.REPORTS_DIR)
@@ -8,9 +8,15 @@ import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from routes import webhook, analysis
-from config import settings
+from config import settings, TEMP_PATH, REPORTS_PATH
+from services.claude_analyzer import get_analyzer
+from services.http_client import close_session
+from services.status_store import status_store
+from services.analysis_cache import analysis_cache
+from services.supabase_client import supabase_service
 
 # Configure logging
 logging.basicConfig(
@@ -24,15 +30,24 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     logger.info("🚀 Starting Rhône Risk Policy Analysis API")
-    logger.info(f"📋 Environment: {settings.ENVIRONMENT}")
-    logger.info(f"🔑 Anthropic API configured: {'Yes' if settings.ANTHROPIC_API_KEY else 'No'}")
+    logger.info("📋 Environment: %s", settings.ENVIRONMENT)
+    logger.info("🔑 Anthropic API configured: %s", "Yes" if settings.ANTHROPIC_API_KEY else "No")
 
     # Create required directories
-    os.makedirs("temp", exist_ok=True)
-    os.makedirs("reports", exist_ok=True)
+    TEMP_PATH.mkdir(parents=True, exist_ok=True)
+    REPORTS_PATH.mkdir(parents=True, exist_ok=True)
 
     yield
 
+    # Close the Claude client if any request created it
+    if get_analyzer.cache_info().currsize:
+        await get_analyzer().close()
+
+    await supabase_service.close()
+    await close_session()
+    await status_store.close()
+    await analysis_cache.close()
+
     logger.info("👋 Shutting down Policy Analysis API")
 
 
@@ -54,6 +69,7 @@ app = FastAPI(
     """,
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -98,5 +114,9 @@ if __name__ == "__main__":
         "main:app",
         host="0.0.0.0",
         port=settings.PORT,
+        loop="uvloop",
+        http="httptools",
+        # Without REDIS_URL analysis status lives in process memory, so scale out deliberately
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
         reload=settings.ENVIRONMENT == "development"
     )
@@ -3,6 +3,10 @@ System Prompt for Claude Policy Analysis
 Contains Rhône Risk's proprietary scoring methodology and analysis framework
 """
 
+import sys
+from functools import lru_cache
+from typing import Tuple
+
 COVERAGE_CATEGORIES = """
 ## COVERAGE CATEGORIES TO ANALYZE
 
@@ -147,6 +151,10 @@ INDUSTRY_CRITERIA = {
 """
 }
 
+# Intern the industry keys so lookups with interned strings (see
+# run_policy_analysis) short-circuit on identity instead of comparing text
+INDUSTRY_CRITERIA = {sys.intern(k): v for k, v in INDUSTRY_CRITERIA.items()}
+
 RED_FLAGS = """
 ## RED FLAGS - ALWAYS DOCUMENT IF PRESENT
 
@@ -270,20 +278,20 @@ IMPORTANT: Your response must be ONLY the JSON object, properly formatted and pa
 """
 
 
-def get_analysis_prompt(client_industry: str = "Other/General", is_renewal: bool = False) -> str:
-    """
-    Build the complete system prompt for policy analysis.
-
-    Args:
-        client_industry: The industry classification of the client
-        is_renewal: Whether this is a renewal policy
+# Focus instructions for splitting one analysis into concurrent section requests.
+# Each is appended to the user message; the system prompt stays identical so
+# all sections share its prompt cache.
+ANALYSIS_SECTIONS = {
+    "first_party": 'For this request, analyze ONLY the First-Party Coverages (categories 1-7). Return a JSON object containing only {"coverage_analysis": {"first_party": [...]}} using the required format.',
+    "third_party": 'For this request, analyze ONLY the Third-Party Coverages (categories 8-14). Return a JSON object containing only {"coverage_analysis": {"third_party": [...]}} using the required format.',
+    "summary": 'For this request, return every section of the required format EXCEPT "coverage_analysis", which is produced separately. Base all scores and the recommendation on a full review of the policy.',
+}
 
-    Returns:
-        Complete system prompt string
-    """
-    industry_criteria = INDUSTRY_CRITERIA.get(client_industry, INDUSTRY_CRITERIA["Other/General"])
+RENEWAL_NOTE = "Note: This is a RENEWAL policy. Pay extra attention to changes from prior term and ensure no gaps in continuous coverage."
 
-    prompt = f"""You are an expert cyber insurance policy analyst for Rhône Risk Advisory, a specialized insurance advisory firm. Your task is to perform a comprehensive analysis of cyber insurance policies using our proprietary evaluation framework.
+# Static prompt fragments, assembled once at import. Only the industry
+# criteria and the renewal note vary between calls.
+_PROMPT_HEADER = f"""You are an expert cyber insurance policy analyst for Rhône Risk Advisory, a specialized insurance advisory firm. Your task is to perform a comprehensive analysis of cyber insurance policies using our proprietary evaluation framework.
 
 ## YOUR ROLE
 
@@ -297,7 +305,9 @@ You will analyze cyber insurance policy documents and produce structured, action
 
 {SCORING_SCALE}
 
-{industry_criteria}
+"""
+
+_PROMPT_MIDDLE = f"""
 
 {RED_FLAGS}
 
@@ -316,9 +326,38 @@ You will analyze cyber insurance policy documents and produce structured, action
 - **NEGOTIATE**: Score 4.0-5.4, significant gaps requiring carrier negotiation
 - **DECLINE**: Score <4.0 or critical unmitigated red flags
 
-{"Note: This is a RENEWAL policy. Pay extra attention to changes from prior term and ensure no gaps in continuous coverage." if is_renewal else ""}
+"""
+
+_PROMPT_FOOTER = f"""
 
 {OUTPUT_FORMAT}
 """
 
-    return prompt
+# Everything except the per-client criteria, kept first so the whole ~1.8K
+# token block is a single shareable prompt-cache prefix (above the 1,024-token
+# minimum the API requires for caching)
+_STATIC_PROMPT = sys.intern(_PROMPT_HEADER + _PROMPT_MIDDLE + _PROMPT_FOOTER)
+
+
+@lru_cache(maxsize=32)
+def get_analysis_prompt_parts(client_industry: str = "Other/General", is_renewal: bool = False) -> Tuple[str, str]:
+    """
+    Split the system prompt into (static prompt, client-specific criteria).
+
+    The static prompt is identical for every request, so callers can mark it
+    as a prompt-cache breakpoint; the industry criteria and renewal note that
+    follow it are small and vary per client.
+
+    Args:
+        client_industry: The industry classification of the client
+        is_renewal: Whether this is a renewal policy
+
+    Returns:
+        Tuple of prompt fragments that concatenate to the full system prompt
+    """
+    industry_criteria = INDUSTRY_CRITERIA.get(client_industry, INDUSTRY_CRITERIA["Other/General"])
+    client_criteria = "\n## CLIENT-SPECIFIC CRITERIA\n" + industry_criteria
+    if is_renewal:
+        client_criteria += "\n" + RENEWAL_NOTE + "\n"
+
+    return _STATIC_PROMPT, client_criteria
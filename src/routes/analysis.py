@@ -2,18 +2,21 @@
 Direct analysis endpoints for testing without webhooks
 """
 
+import asyncio
 import logging
-import uuid
 import os
 from datetime import datetime
+from secrets import token_hex
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, BackgroundTasks, Depends
 from fastapi.responses import FileResponse
 from pydantic import BaseModel
 
-from config import settings
-from services.orchestrator import run_policy_analysis, analysis_status_store
+from config import TEMP_PATH
+from services.claude_analyzer import ClaudeAnalyzer, get_analyzer
+from services.orchestrator import run_policy_analysis
+from services.status_store import status_store
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +42,12 @@ class AnalysisStatusResponse(BaseModel):
     result: Optional[dict] = None
 
 
+def _write_file(path: str, content: bytes):
+    """Write bytes to disk (run via asyncio.to_thread)"""
+    with open(path, "wb") as f:
+        f.write(content)
+
+
 @router.post("/upload")
 async def analyze_uploaded_policy(
     background_tasks: BackgroundTasks,
@@ -47,6 +56,7 @@ async def analyze_uploaded_policy(
     client_industry: str = Form("Other/General", description="Client industry"),
     policy_type: str = Form("cyber", description="Policy type"),
     renewal: bool = Form(False, description="Is this a renewal?"),
+    analyzer: ClaudeAnalyzer = Depends(get_analyzer),
 ):
     """
     Upload a policy PDF directly for analysis (without webhook integration).
@@ -63,20 +73,18 @@ async def analyze_uploaded_policy(
         raise HTTPException(status_code=400, detail="Only PDF files are accepted")
 
     # Generate analysis ID
-    analysis_id = f"analysis_{uuid.uuid4().hex[:12]}"
+    analysis_id = "analysis_" + token_hex(6)
 
     # Save uploaded file temporarily
-    temp_path = os.path.join(settings.TEMP_DIR, f"{analysis_id}_{file.filename}")
-    os.makedirs(settings.TEMP_DIR, exist_ok=True)
+    temp_path = str(TEMP_PATH / f"{analysis_id}_{file.filename}")
 
-    with open(temp_path, "wb") as f:
-        content = await file.read()
-        f.write(content)
+    content = await file.read()
+    await asyncio.to_thread(_write_file, temp_path, content)
 
-    logger.info(f"📤 Direct upload received: {file.filename}")
-    logger.info(f"   Client: {client_name}")
-    logger.info(f"   Industry: {client_industry}")
-    logger.info(f"   Analysis ID: {analysis_id}")
+    logger.info("📤 Direct upload received: %s", file.filename)
+    logger.info("   Client: %s", client_name)
+    logger.info("   Industry: %s", client_industry)
+    logger.info("   Analysis ID: %s", analysis_id)
 
     # Create payload similar to webhook
     payload = {
@@ -99,6 +107,7 @@ async def analyze_uploaded_policy(
         run_policy_analysis,
         analysis_id=analysis_id,
         payload=payload,
+        analyzer=analyzer,
     )
 
     return {
@@ -116,10 +125,11 @@ async def get_analysis_status(analysis_id: str):
 
     Returns the analysis progress and results when complete.
     """
-    if analysis_id not in analysis_status_store:
+    status = await status_store.get(analysis_id)
+    if status is None:
         raise HTTPException(status_code=404, detail="Analysis not found")
 
-    return AnalysisStatusResponse(**analysis_status_store[analysis_id])
+    return AnalysisStatusResponse(**status)
 
 
 @router.get("/{analysis_id}/report")
@@ -127,10 +137,10 @@ async def download_report(analysis_id: str):
     """
     Download the generated PDF report for a completed analysis.
     """
-    if analysis_id not in analysis_status_store:
+    status = await status_store.get(analysis_id)
+    if status is None:
         raise HTTPException(status_code=404, detail="Analysis not found")
 
-    status = analysis_status_store[analysis_id]
     if status.get("status") != "completed":
         raise HTTPException(
             status_code=400,
@@ -158,9 +168,9 @@ async def list_analyses():
             {
                 "analysis_id": aid,
                 "status": data.get("status"),
-                "client_name": data.get("result", {}).get("client_name", "Unknown"),
+                "client_name": data.get("client_name") or "Unknown",
                 "started_at": data.get("started_at"),
             }
-            for aid, data in analysis_status_store.items()
+            for aid, data in (await status_store.all()).items()
         ]
     }
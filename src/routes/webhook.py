@@ -5,20 +5,30 @@ Webhook routes for receiving policy upload notifications
 import hmac
 import hashlib
 import logging
-import uuid
 from datetime import datetime
+from secrets import token_hex
 from typing import Optional
+from urllib.parse import urlsplit
 
-from fastapi import APIRouter, HTTPException, Header, BackgroundTasks
-from pydantic import BaseModel, HttpUrl
+from fastapi import APIRouter, HTTPException, Header, BackgroundTasks, Depends, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError, field_validator
 
 from config import settings
+from services.claude_analyzer import ClaudeAnalyzer, get_analyzer
 from services.orchestrator import run_policy_analysis
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Keyed HMAC state for the configured secret; copied per request so the
+# key pads are only derived once
+_hmac_template = (
+    hmac.new(settings.WEBHOOK_SECRET.encode(), digestmod=hashlib.sha256)
+    if settings.WEBHOOK_SECRET else None
+)
+
 
 class PolicyUploadedPayload(BaseModel):
     """Webhook payload when a policy is uploaded"""
@@ -27,14 +37,25 @@ class PolicyUploadedPayload(BaseModel):
     client_id: str
     client_name: str
     client_industry: Optional[str] = "Other/General"
-    file_url: HttpUrl  # Presigned URL to download the policy PDF
+    file_url: str  # Presigned URL to download the policy PDF
     file_name: str
     file_size: Optional[int] = None
     uploaded_by: Optional[str] = None
     policy_type: Optional[str] = "cyber"
     renewal: Optional[bool] = False
     priority: Optional[str] = "normal"
-    callback_url: Optional[HttpUrl] = None
+    callback_url: Optional[str] = None
+
+    @field_validator("file_url", "callback_url")
+    @classmethod
+    def _check_url(cls, v: Optional[str]) -> Optional[str]:
+        """Require an absolute http(s) URL, keeping it as a plain string"""
+        if v is None:
+            return v
+        parts = urlsplit(v)
+        if parts.scheme not in ("http", "https") or not parts.netloc:
+            raise ValueError("invalid URL: expected an absolute http(s) URL")
+        return v
 
 
 class WebhookResponse(BaseModel):
@@ -51,21 +72,59 @@ def verify_signature(payload: bytes, signature: str, secret: str) -> bool:
         logger.warning("No webhook secret configured - skipping verification")
         return True
 
-    expected = hmac.new(
-        secret.encode(),
-        payload,
-        hashlib.sha256
-    ).hexdigest()
+    if _hmac_template is not None and secret == settings.WEBHOOK_SECRET:
+        mac = _hmac_template.copy()
+    else:
+        mac = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+    mac.update(payload)
+    expected = mac.hexdigest()
 
     provided = signature.replace("sha256=", "")
     return hmac.compare_digest(expected, provided)
 
 
-@router.post("/policy-uploaded", response_model=WebhookResponse)
+async def verified_payload(
+    request: Request,
+    x_webhook_signature: Optional[str] = Header(None),
+) -> PolicyUploadedPayload:
+    """
+    Verify the webhook signature against the raw request body, then parse it.
+
+    The body is read once and the HMAC covers the exact bytes that were sent.
+    Pydantic then validates the JSON directly, without building an
+    intermediate dict first.
+    """
+    body = await request.body()
+
+    if not verify_signature(body, x_webhook_signature or "", settings.WEBHOOK_SECRET):
+        logger.warning("⚠️ Rejected webhook with invalid signature")
+        raise HTTPException(status_code=401, detail="Invalid webhook signature")
+
+    try:
+        return PolicyUploadedPayload.model_validate_json(body)
+    except ValidationError as e:
+        # Match FastAPI's own body-validation errors ("loc": ["body", <field>, ...])
+        raise RequestValidationError([
+            {**error, "loc": ("body", *error["loc"])}
+            for error in e.errors(include_url=False)
+        ])
+
+
+@router.post(
+    "/policy-uploaded",
+    response_model=WebhookResponse,
+    # The body is parsed inside verified_payload, so document it explicitly
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/json": {"schema": PolicyUploadedPayload.model_json_schema()}},
+            "required": True,
+        },
+    },
+)
 async def handle_policy_uploaded(
-    payload: PolicyUploadedPayload,
     background_tasks: BackgroundTasks,
-    x_webhook_signature: Optional[str] = Header(None),
+    payload: PolicyUploadedPayload = Depends(verified_payload),
+    analyzer: ClaudeAnalyzer = Depends(get_analyzer),
 ):
     """
     Receive notification that a policy has been uploaded.
@@ -79,23 +138,27 @@ async def handle_policy_uploaded(
 
     The analysis runs in the background - this endpoint returns immediately
     with an analysis_id that can be used to track progress.
+
+    Requests must carry an X-Webhook-Signature header (sha256=<hex HMAC of
+    the body>) when WEBHOOK_SECRET is configured.
     """
-    logger.info(f"📥 Received policy upload webhook for client: {payload.client_name}")
-    logger.info(f"   Policy ID: {payload.policy_id}")
-    logger.info(f"   Industry: {payload.client_industry}")
-    logger.info(f"   File: {payload.file_name}")
+    logger.info("📥 Received policy upload webhook for client: %s", payload.client_name)
+    logger.info("   Policy ID: %s", payload.policy_id)
+    logger.info("   Industry: %s", payload.client_industry)
+    logger.info("   File: %s", payload.file_name)
 
     # Generate unique analysis ID
-    analysis_id = f"analysis_{uuid.uuid4().hex[:12]}"
+    analysis_id = "analysis_" + token_hex(6)
 
     # Queue the analysis to run in background
     background_tasks.add_task(
         run_policy_analysis,
         analysis_id=analysis_id,
-        payload=payload.model_dump(),
+        payload=payload,
+        analyzer=analyzer,
     )
 
-    logger.info(f"✅ Analysis queued: {analysis_id}")
+    logger.info("✅ Analysis queued: %s", analysis_id)
 
     return WebhookResponse(
         success=True,
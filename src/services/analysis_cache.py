@@ -0,0 +1,84 @@
+"""
+Analysis Result Cache
+Memoizes Claude analyses of identical policy text in Redis
+"""
+
+import hashlib
+import logging
+from typing import Dict, Any, Optional
+
+import orjson
+
+from config import settings
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Bump the version whenever the prompt or output schema changes; the model
+# name is part of every key, so switching CLAUDE_MODEL starts a fresh cache
+KEY_PREFIX = "analysis:v1:"
+
+
+class AnalysisCache:
+    """
+    Caches analysis_data keyed on a SHA-256 of the extracted policy text.
+
+    Re-uploads and retries of the same PDF then skip the Claude call
+    entirely. Entries expire after ANALYSIS_CACHE_TTL_SECONDS. Without
+    Redis the cache is disabled, so every analysis goes to Claude.
+    """
+
+    def __init__(self):
+        self.redis = None
+        if settings.REDIS_URL and redis is not None:
+            self.redis = redis.Redis.from_url(settings.REDIS_URL)
+
+    @staticmethod
+    def key(
+        policy_text: str,
+        client_name: str,
+        client_industry: str,
+        policy_type: str,
+        is_renewal: bool,
+    ) -> str:
+        """Build the cache key for one analysis request"""
+        # Client name and industry are part of the prompt, so they are hashed too
+        digest = hashlib.sha256(policy_text.encode("utf-8"))
+        digest.update(f"\0{client_name}\0{client_industry}".encode("utf-8"))
+        return f"{KEY_PREFIX}{settings.CLAUDE_MODEL}:{digest.hexdigest()}:{policy_type}:{is_renewal}"
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached analysis_data, or None on a miss"""
+        if self.redis is None:
+            return None
+
+        try:
+            cached = await self.redis.get(key)
+        except redis.RedisError as e:
+            logger.error("❌ Analysis cache read failed: %s", e)
+            return None
+
+        return orjson.loads(cached) if cached is not None else None
+
+    async def set(self, key: str, analysis_data: Dict[str, Any]):
+        """Store analysis_data under key"""
+        if self.redis is None:
+            return
+
+        try:
+            await self.redis.set(key, orjson.dumps(analysis_data), ex=settings.ANALYSIS_CACHE_TTL_SECONDS)
+        except redis.RedisError as e:
+            logger.error("❌ Analysis cache write failed: %s", e)
+
+    async def close(self):
+        """Close the Redis connection pool"""
+        if self.redis is not None:
+            await self.redis.aclose()
+
+
+# Module-level instance
+analysis_cache = AnalysisCache()
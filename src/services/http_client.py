@@ -0,0 +1,46 @@
+"""
+Shared HTTP client session
+Reuses one aiohttp connection pool for callbacks and downloads
+"""
+
+import logging
+from typing import Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_session() -> aiohttp.ClientSession:
+    """
+    Return the shared ClientSession, creating it on first use.
+
+    Keeps connections (and their TLS sessions) alive across requests instead
+    of paying DNS + TCP + TLS setup for every callback or download.
+    """
+    global _session
+
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=20,
+                ttl_dns_cache=300,
+                keepalive_timeout=75,
+            )
+        )
+
+    return _session
+
+
+async def close_session():
+    """Close the shared session (called on application shutdown)"""
+    global _session
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+        logger.info("🔌 HTTP client session closed")
+
+    _session = None
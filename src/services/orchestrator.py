@@ -5,24 +5,39 @@ Coordinates the policy analysis workflow from end to end
 
 import logging
 import asyncio
+import sys
+import time
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
+from urllib.parse import urlsplit
 
 import aiohttp
+import orjson
+from pydantic import BaseModel
 
-from config import settings
+from config import settings, REPORTS_PATH
 from services.pdf_extractor import extractor
-from services.claude_analyzer import analyzer
+from services.claude_analyzer import ClaudeAnalyzer
 from services.report_generator import generator
 from services.supabase_client import supabase_service
+from services.http_client import get_session
+from services.status_store import status_store
+from services.analysis_cache import analysis_cache
+from services.retry import retry_with_backoff, get_breaker
 
 logger = logging.getLogger(__name__)
 
-# In-memory status store (use Redis/DB in production)
-analysis_status_store: Dict[str, Dict[str, Any]] = {}
+# Caps how many extraction/Claude/report pipelines run at once; the rest wait
+# (with Claude batching on, only extraction and report steps hold a slot)
+_analysis_slots = asyncio.Semaphore(settings.MAX_CONCURRENT_ANALYSES)
 
 
-async def run_policy_analysis(analysis_id: str, payload: Dict[str, Any]):
+async def run_policy_analysis(
+    analysis_id: str,
+    payload: Union[BaseModel, Dict[str, Any]],
+    analyzer: ClaudeAnalyzer,
+):
     """
     Main orchestration function for policy analysis.
 
@@ -34,189 +49,230 @@ async def run_policy_analysis(analysis_id: str, payload: Dict[str, Any]):
 
     Args:
         analysis_id: Unique identifier for this analysis
-        payload: Webhook payload or direct upload data
+        payload: Webhook payload model or direct upload data dict
+        analyzer: Claude analyzer to run the analysis with
     """
-    logger.info(f"🚀 Starting analysis workflow: {analysis_id}")
+    logger.info("🚀 Starting analysis workflow: %s", analysis_id)
+
+    # Read webhook model fields in place instead of paying for a recursive model_dump()
+    if isinstance(payload, BaseModel):
+        payload = vars(payload)
+
+    # Monotonic start time for duration math (immune to wall-clock jumps)
+    started_monotonic = time.monotonic()
 
     # Initialize status
-    analysis_status_store[analysis_id] = {
+    await status_store.put(analysis_id, {
         "analysis_id": analysis_id,
-        "status": "started",
-        "progress": "Initializing...",
+        "client_name": payload.get("client_name", "Unknown Client"),
+        "status": "queued",
+        "progress": "Waiting for an analysis slot...",
         "started_at": datetime.utcnow().isoformat(),
         "completed_at": None,
         "error": None,
         "result": None,
-    }
-
-    try:
-        # Extract metadata from payload
-        client_name = payload.get("client_name", "Unknown Client")
-        client_industry = payload.get("client_industry", "Other/General")
-        policy_type = payload.get("policy_type", "cyber")
-        is_renewal = payload.get("renewal", False)
-        callback_url = payload.get("callback_url")
-
-        # STEP 1: Get the PDF content
-        _update_status(analysis_id, "extracting", "Extracting text from PDF...")
-
-        local_path = payload.get("_local_file_path")
-        file_url = payload.get("file_url")
-
-        if local_path:
-            # Direct upload - file already saved locally
-            extraction = await extractor.extract_from_file(local_path)
-        elif file_url:
-            # Webhook - download from presigned URL
-            extraction = await extractor.extract_from_url(str(file_url))
-        else:
-            raise ValueError("No file path or URL provided")
-
-        if not extraction.success:
-            raise Exception(f"PDF extraction failed: {extraction.error}")
-
-        logger.info(f"   Extracted {len(extraction.text)} chars from {extraction.page_count} pages")
-
-        # STEP 2: Analyze with Claude
-        _update_status(analysis_id, "analyzing", "Analyzing policy with Claude...")
-
-        analysis_result = await analyzer.analyze_policy(
-            policy_text=extraction.text,
-            client_name=client_name,
-            client_industry=client_industry,
-            policy_type=policy_type,
-            is_renewal=is_renewal,
-        )
-
-        if not analysis_result.success:
-            raise Exception(f"Claude analysis failed: {analysis_result.error}")
-
-        analysis_data = analysis_result.analysis_data
-        logger.info(f"   Analysis complete, tokens used: {analysis_result.tokens_used}")
-
-        # STEP 3: Generate PDF report
-        _update_status(analysis_id, "generating", "Generating PDF report...")
-
-        report_result = await generator.generate_report(
-            analysis_data=analysis_data,
-            output_dir=settings.REPORTS_DIR,
-        )
+    })
+
+    # Batched Claude calls can wait minutes to hours for their batch, so with
+    # batching on the slots only cover extraction and report generation;
+    # otherwise one slot covers the whole pipeline
+    batching = settings.CLAUDE_BATCH_ENABLED
+    pipeline_slot = nullcontext() if batching else _analysis_slots
+    step_slot = _analysis_slots if batching else nullcontext()
+
+    async with pipeline_slot:
+        try:
+            async with step_slot:
+                await _update_status(analysis_id, "started", "Initializing...")
+
+                # Extract metadata from payload
+                client_name = payload.get("client_name", "Unknown Client")
+                client_industry = sys.intern(payload.get("client_industry") or "Other/General")
+                policy_type = payload.get("policy_type", "cyber")
+                is_renewal = payload.get("renewal", False)
+                callback_url = payload.get("callback_url")
+
+                # STEP 1: Get the PDF content
+                await _update_status(analysis_id, "extracting", "Extracting text from PDF...")
+
+                local_path = payload.get("_local_file_path")
+                file_url = payload.get("file_url")
+
+                if local_path:
+                    # Direct upload - file already saved locally
+                    extraction = await extractor.extract_from_file(local_path)
+                elif file_url:
+                    # Webhook - download from presigned URL
+                    extraction = await extractor.extract_from_url(file_url)
+                else:
+                    raise ValueError("No file path or URL provided")
+
+                if not extraction.success:
+                    raise Exception(f"PDF extraction failed: {extraction.error}")
+
+                logger.info("   Extracted %d chars from %d pages", len(extraction.text), extraction.page_count)
+
+            # STEP 2: Analyze with Claude, unless this exact policy was analyzed recently
+            cache_key = analysis_cache.key(extraction.text, client_name, client_industry, policy_type, is_renewal)
+            analysis_data = await analysis_cache.get(cache_key)
+
+            if analysis_data is not None:
+                logger.info("   Reusing cached analysis: %s", cache_key)
+            else:
+                await _update_status(analysis_id, "analyzing", "Analyzing policy with Claude...")
+
+                analyze = analyzer.analyze_policy_batched if settings.CLAUDE_BATCH_ENABLED else analyzer.analyze_policy
+                analysis_result = await analyze(
+                    policy_text=extraction.text,
+                    client_name=client_name,
+                    client_industry=client_industry,
+                    policy_type=policy_type,
+                    is_renewal=is_renewal,
+                )
+
+                if not analysis_result.success:
+                    raise Exception(f"Claude analysis failed: {analysis_result.error}")
+
+                analysis_data = analysis_result.analysis_data
+                logger.info("   Analysis complete, tokens used: %d", analysis_result.tokens_used)
+                # Unparsed responses ({"raw_analysis": ...}) would pin a failure for the whole TTL
+                if "raw_analysis" not in analysis_data:
+                    await analysis_cache.set(cache_key, analysis_data)
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("   Analysis data: %s", orjson.dumps(analysis_data, option=orjson.OPT_INDENT_2).decode())
+
+            # STEP 3: Generate PDF report
+            async with step_slot:
+                await _update_status(analysis_id, "generating", "Generating PDF report...")
+
+                report_result = await generator.generate_report(
+                    analysis_data=analysis_data,
+                    output_dir=REPORTS_PATH,
+                    analysis_id=analysis_id,
+                )
+
+                if not report_result.success:
+                    logger.warning("   Report generation failed: %s", report_result.error)
+                    report_path = None
+                else:
+                    report_path = report_result.report_path
+                    logger.info("   Report generated: %s", report_path)
 
-        if not report_result.success:
-            logger.warning(f"   Report generation failed: {report_result.error}")
-            report_path = None
-        else:
-            report_path = report_result.report_path
-            logger.info(f"   Report generated: {report_path}")
-
-        # Build result summary
-        exec_summary = analysis_data.get("executive_summary", {})
-        key_metrics = exec_summary.get("key_metrics", {})
-
-        result = {
-            "analysis_id": analysis_id,
-            "policy_id": payload.get("policy_id"),
-            "client_id": payload.get("client_id"),
-            "client_name": client_name,
-            "status": "completed",
-            "overall_score": key_metrics.get("overall_maturity_score"),
-            "recommendation": exec_summary.get("recommendation"),
-            "report_path": report_path,
-            "analysis_data": analysis_data,
-            "completed_at": datetime.utcnow().isoformat(),
-            "processing_time_seconds": _calculate_duration(analysis_id),
-        }
-
-                # STEP 5: Store results in Supabase
-                policy_id = payload.get("policy_id")
-                if policy_id:
-                                await supabase_service.store_analysis_result(
-                                                    policy_id=policy_id,
-                                                    analysis_id=analysis_id,
-                                                    analysis_data=result,
-                                                    status="completed"
-                                                )
-
-        # Update status to complete
-        analysis_status_store[analysis_id].update({
-            "status": "completed",
-            "progress": "Analysis complete",
-            "completed_at": result["completed_at"],
-            "result": result,
-        })
-
-        logger.info(f"✅ Analysis complete: {analysis_id}")
-        logger.info(f"   Score: {result['overall_score']}")
-        logger.info(f"   Recommendation: {result['recommendation']}")
-
-        # STEP 4: Send callback (if configured)
-        if callback_url:
-            await _send_callback(callback_url, result)
+            # Build result summary
+            exec_summary = analysis_data.get("executive_summary", {})
+            key_metrics = exec_summary.get("key_metrics", {})
 
-    except Exception as e:
-        logger.error(f"❌ Analysis failed: {analysis_id} - {str(e)}")
-
-        # Update status to failed
-        analysis_status_store[analysis_id].update({
-            "status": "failed",
-            "progress": "Analysis failed",
-            "error": str(e),
-            "completed_at": datetime.utcnow().isoformat(),
-        })
-
-        # Send failure callback if configured
-        callback_url = payload.get("callback_url")
-        if callback_url:
-            await _send_callback(callback_url, {
+            result = {
                 "analysis_id": analysis_id,
                 "policy_id": payload.get("policy_id"),
                 "client_id": payload.get("client_id"),
-                "status": "failed",
-                "error_message": str(e),
+                "client_name": client_name,
+                "status": "completed",
+                "overall_score": key_metrics.get("overall_maturity_score"),
+                "recommendation": exec_summary.get("recommendation"),
+                "report_path": report_path,
+                "analysis_data": analysis_data,
                 "completed_at": datetime.utcnow().isoformat(),
+                "processing_time_seconds": _calculate_duration(started_monotonic),
+            }
+
+            logger.info("✅ Analysis complete: %s", analysis_id)
+            logger.info("   Score: %s", result['overall_score'])
+            logger.info("   Recommendation: %s", result['recommendation'])
+
+            # STEP 4: Store in Supabase and mark complete concurrently, then send
+            # the callback so its receiver already sees the stored result
+            policy_id = payload.get("policy_id")
+            outcomes = await asyncio.gather(
+                supabase_service.store_analysis_result(
+                    policy_id=policy_id,
+                    analysis_id=analysis_id,
+                    analysis_data=result,
+                    status="completed"
+                ) if policy_id else asyncio.sleep(0),
+                status_store.put(analysis_id, {
+                    "status": "completed",
+                    "progress": "Analysis complete",
+                    "completed_at": result["completed_at"],
+                    "result": result,
+                }),
+                return_exceptions=True,
+            )
+
+            for step, outcome in zip(("Supabase storage", "Status update"), outcomes):
+                if isinstance(outcome, Exception):
+                    logger.error("   %s failed: %s", step, outcome)
+
+            if callback_url:
+                await _send_callback(callback_url, result)
+
+        except Exception as e:
+            logger.error("❌ Analysis failed: %s - %s", analysis_id, e)
+            failed_at = datetime.utcnow().isoformat()
+
+            # Update status to failed
+            await status_store.put(analysis_id, {
+                "status": "failed",
+                "progress": "Analysis failed",
+                "error": str(e),
+                "completed_at": failed_at,
             })
 
-
-def _update_status(analysis_id: str, status: str, progress: str):
-    """Update the status of an analysis"""
-    if analysis_id in analysis_status_store:
-        analysis_status_store[analysis_id].update({
-            "status": status,
-            "progress": progress,
-        })
-    logger.info(f"   [{analysis_id}] {progress}")
+            # Send failure callback if configured
+            callback_url = payload.get("callback_url")
+            if callback_url:
+                await _send_callback(callback_url, {
+                    "analysis_id": analysis_id,
+                    "policy_id": payload.get("policy_id"),
+                    "client_id": payload.get("client_id"),
+                    "status": "failed",
+                    "error_message": str(e),
+                    "completed_at": failed_at,
+                })
 
 
-def _calculate_duration(analysis_id: str) -> float:
-    """Calculate processing duration in seconds"""
-    if analysis_id not in analysis_status_store:
-        return 0
+async def _update_status(analysis_id: str, status: str, progress: str):
+    """Update the status of an analysis"""
+    await status_store.put(analysis_id, {
+        "status": status,
+        "progress": progress,
+    })
+    logger.info("   [%s] %s", analysis_id, progress)
 
-    started = analysis_status_store[analysis_id].get("started_at")
-    if not started:
-        return 0
 
-    start_dt = datetime.fromisoformat(started)
-    duration = (datetime.utcnow() - start_dt).total_seconds()
-    return round(duration, 2)
+def _calculate_duration(started_monotonic: float) -> float:
+    """Calculate processing duration in seconds from a time.monotonic() start"""
+    return round(time.monotonic() - started_monotonic, 2)
 
 
 async def _send_callback(callback_url: str, result: Dict[str, Any]):
     """Send analysis results to callback URL"""
-    logger.info(f"📤 Sending callback to {callback_url}")
+    logger.info("📤 Sending callback to %s", callback_url)
+
+    body = orjson.dumps(result, option=orjson.OPT_NAIVE_UTC)
+
+    async def _post() -> int:
+        async with get_session().post(
+            callback_url,
+            data=body,
+            headers={"Content-Type": "application/json"},
+            timeout=aiohttp.ClientTimeout(total=settings.CALLBACK_TIMEOUT),
+        ) as response:
+            # Server errors are transient and retried; other statuses are final
+            if response.status >= 500:
+                response.raise_for_status()
+            return response.status
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                callback_url,
-                json=result,
-                headers={"Content-Type": "application/json"},
-                timeout=aiohttp.ClientTimeout(total=settings.CALLBACK_TIMEOUT),
-            ) as response:
-                if response.status == 200:
-                    logger.info(f"   Callback sent successfully")
-                else:
-                    logger.warning(f"   Callback returned status {response.status}")
+        status = await retry_with_backoff(
+            _post,
+            breaker=get_breaker(f"callback:{urlsplit(callback_url).netloc}"),
+        )
+        if status == 200:
+            logger.info("   Callback sent successfully")
+        else:
+            logger.warning("   Callback returned status %d", status)
 
     except Exception as e:
-        logger.error(f"   Callback failed: {str(e)}")
+        logger.error("   Callback failed: %s", e)
@@ -3,15 +3,23 @@ PDF Text Extraction Service
 Extracts text content from policy PDFs using pdfplumber
 """
 
+import asyncio
 import logging
 import os
+import uuid
+from pathlib import Path
 from typing import Dict, List, Optional
 from dataclasses import dataclass
 
 import pdfplumber
 
+from config import TEMP_PATH
+from services.http_client import get_session
+
 logger = logging.getLogger(__name__)
 
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # bytes
+
 
 @dataclass
 class ExtractionResult:
@@ -44,7 +52,7 @@ class PDFExtractor:
         Returns:
             ExtractionResult with extracted text and metadata
         """
-        logger.info(f"📄 Starting PDF extraction: {file_path}")
+        logger.info("📄 Starting PDF extraction: %s", file_path)
 
         if not os.path.exists(file_path):
             return ExtractionResult(
@@ -56,6 +64,11 @@ class PDFExtractor:
                 error=f"File not found: {file_path}"
             )
 
+        # pdfplumber parsing is CPU-bound and synchronous; keep it off the event loop
+        return await asyncio.to_thread(self._extract_pdf, file_path)
+
+    def _extract_pdf(self, file_path: str) -> ExtractionResult:
+        """Synchronously parse a PDF file with pdfplumber"""
         try:
             pages = []
             tables = []
@@ -63,7 +76,7 @@ class PDFExtractor:
 
             with pdfplumber.open(file_path) as pdf:
                 page_count = len(pdf.pages)
-                logger.info(f"   PDF has {page_count} pages")
+                logger.info("   PDF has %d pages", page_count)
 
                 for i, page in enumerate(pdf.pages):
                     page_num = i + 1
@@ -91,16 +104,16 @@ class PDFExtractor:
 
                     # Progress logging
                     if page_num % 10 == 0:
-                        logger.info(f"   Processed {page_num}/{page_count} pages")
+                        logger.info("   Processed %d/%d pages", page_num, page_count)
 
             combined_text = "\n\n".join(full_text)
             total_chars = len(combined_text)
 
-            logger.info(f"✅ Extraction complete: {total_chars} chars, {len(tables)} tables")
+            logger.info("✅ Extraction complete: %d chars, %d tables", total_chars, len(tables))
 
             # Quality check
             if total_chars < self.min_text_threshold:
-                logger.warning(f"⚠️ Low text extraction ({total_chars} chars) - may need OCR")
+                logger.warning("⚠️ Low text extraction (%d chars) - may need OCR", total_chars)
 
             return ExtractionResult(
                 success=True,
@@ -111,7 +124,7 @@ class PDFExtractor:
             )
 
         except Exception as e:
-            logger.error(f"❌ PDF extraction failed: {str(e)}")
+            logger.error("❌ PDF extraction failed: %s", e)
             return ExtractionResult(
                 success=False,
                 text="",
@@ -121,57 +134,48 @@ class PDFExtractor:
                 error=str(e)
             )
 
-    async def extract_from_url(self, url: str, temp_dir: str = "temp") -> ExtractionResult:
+    async def extract_from_url(self, url: str, temp_dir: Path = TEMP_PATH) -> ExtractionResult:
         """
         Download PDF from URL and extract text.
 
         Args:
             url: Presigned URL to download PDF
-            temp_dir: Directory for temporary file storage
+            temp_dir: Existing directory for temporary file storage
 
         Returns:
             ExtractionResult with extracted text
         """
-        import aiohttp
-        import uuid
-
-        logger.info(f"📥 Downloading PDF from URL")
+        logger.info("📥 Downloading PDF from URL")
 
-        os.makedirs(temp_dir, exist_ok=True)
-        temp_path = os.path.join(temp_dir, f"download_{uuid.uuid4().hex[:8]}.pdf")
+        temp_path = str(temp_dir / f"download_{uuid.uuid4().hex[:8]}.pdf")
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        return ExtractionResult(
-                            success=False,
-                            text="",
-                            page_count=0,
-                            pages=[],
-                            tables=[],
-                            error=f"Failed to download PDF: HTTP {response.status}"
-                        )
-
-                    content = await response.read()
-                    with open(temp_path, "wb") as f:
-                        f.write(content)
-
-            logger.info(f"   Downloaded {len(content)} bytes")
+            # Stream the body to disk in fixed-size chunks rather than
+            # buffering the whole PDF in memory
+            async with get_session().get(url) as response:
+                if response.status != 200:
+                    return ExtractionResult(
+                        success=False,
+                        text="",
+                        page_count=0,
+                        pages=[],
+                        tables=[],
+                        error=f"Failed to download PDF: HTTP {response.status}"
+                    )
+
+                size = 0
+                with open(temp_path, "wb") as f:
+                    async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                        size += len(chunk)
+
+            logger.info("   Downloaded %d bytes", size)
 
             # Extract from downloaded file
-            result = await self.extract_from_file(temp_path)
-
-            # Cleanup temp file
-            try:
-                os.remove(temp_path)
-            except:
-                pass
-
-            return result
+            return await self.extract_from_file(temp_path)
 
         except Exception as e:
-            logger.error(f"❌ Download/extraction failed: {str(e)}")
+            logger.error("❌ Download/extraction failed: %s", e)
             return ExtractionResult(
                 success=False,
                 text="",
@@ -181,6 +185,13 @@ class PDFExtractor:
                 error=str(e)
             )
 
+        finally:
+            # Cleanup temp file
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
 
 # Module-level instance for convenience
 extractor = PDFExtractor()
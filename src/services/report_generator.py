@@ -3,9 +3,11 @@ PDF Report Generator
 Creates branded Rhône Risk policy analysis reports
 """
 
+import asyncio
 import logging
-import os
 from datetime import datetime
+from pathlib import Path
+from secrets import token_hex
 from typing import Dict, Any, Optional
 from dataclasses import dataclass
 
@@ -19,7 +21,7 @@ from reportlab.platypus import (
 )
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 
-from config import settings
+from config import settings, REPORTS_PATH
 
 logger = logging.getLogger(__name__)
 
@@ -132,29 +134,31 @@ class ReportGenerator:
     async def generate_report(
         self,
         analysis_data: Dict[str, Any],
-        output_dir: str = "reports",
+        output_dir: Path = REPORTS_PATH,
+        analysis_id: Optional[str] = None,
     ) -> ReportResult:
         """
         Generate a branded PDF report from analysis data.
 
         Args:
             analysis_data: Structured analysis output from Claude
-            output_dir: Directory to save the report
+            output_dir: Existing directory to save the report
+            analysis_id: Analysis the report belongs to, used to keep filenames unique
 
         Returns:
             ReportResult with path to generated PDF
         """
         client_name = analysis_data.get("client_company", "Unknown Client")
-        logger.info(f"📄 Generating report for {client_name}")
-
-        os.makedirs(output_dir, exist_ok=True)
+        logger.info("📄 Generating report for %s", client_name)
 
         # Create filename
         safe_name = "".join(c for c in client_name if c.isalnum() or c in (' ', '-', '_')).strip()
         safe_name = safe_name.replace(' ', '_')
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{safe_name}_Policy_Analysis_{timestamp}.pdf"
-        filepath = os.path.join(output_dir, filename)
+        # Concurrent reports for one client can share a timestamp
+        suffix = analysis_id or token_hex(4)
+        filename = f"{safe_name}_Policy_Analysis_{timestamp}_{suffix}.pdf"
+        filepath = str(output_dir / filename)
 
         try:
             doc = SimpleDocTemplate(
@@ -187,10 +191,10 @@ class ReportGenerator:
             # Recommendations
             story.extend(self._create_recommendations_section(analysis_data))
 
-            # Build the PDF
-            doc.build(story)
+            # Build the PDF (synchronous reportlab rendering, run in a worker thread)
+            await asyncio.to_thread(doc.build, story)
 
-            logger.info(f"✅ Report generated: {filepath}")
+            logger.info("✅ Report generated: %s", filepath)
 
             return ReportResult(
                 success=True,
@@ -198,7 +202,7 @@ class ReportGenerator:
             )
 
         except Exception as e:
-            logger.error(f"❌ Report generation failed: {str(e)}")
+            logger.error("❌ Report generation failed: %s", e)
             return ReportResult(
                 success=False,
                 error=str(e),
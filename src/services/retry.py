@@ -0,0 +1,134 @@
+"""
+Retry and Circuit Breaker Helpers
+Exponential backoff with jitter for transient downstream failures
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because its circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Fails fast while a downstream service is known to be down.
+
+    closed:    calls flow normally; consecutive failures are counted
+    open:      calls are refused until `timeout` seconds have passed
+    half_open: trial calls are allowed; `success_threshold` successes close
+               the circuit again, any failure re-opens it
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        timeout: float = 30.0,
+        success_threshold: int = 2,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.timeout = timeout
+        self.success_threshold = success_threshold
+
+        self.state = "closed"
+        self.failures = 0
+        self.successes = 0
+        self.opened_at = 0.0
+
+    def can_execute(self) -> bool:
+        """Whether a call may be attempted right now"""
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.timeout:
+                return False
+            self.state = "half_open"
+            self.successes = 0
+        return True
+
+    def record_outcome(self, ok: bool):
+        """Record the result of an attempted call"""
+        if ok:
+            self.failures = 0
+            if self.state == "half_open":
+                self.successes += 1
+                if self.successes >= self.success_threshold:
+                    self.state = "closed"
+                    logger.info("🟢 Circuit closed: %s", self.name)
+            return
+
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning("🔴 Circuit opened: %s", self.name)
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the shared circuit breaker for a downstream, creating it on first use"""
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
+
+
+async def retry_with_backoff(
+    fn: Callable[[], Awaitable[Any]],
+    *,
+    attempts: int = 4,
+    base: float = 0.1,
+    cap: float = 5.0,
+    jitter: float = 0.1,
+    retry_on: Tuple[Type[BaseException], ...] = (aiohttp.ClientError, asyncio.TimeoutError),
+    breaker: Optional[CircuitBreaker] = None,
+) -> Any:
+    """
+    Call fn() until it succeeds, retrying transient failures with backoff.
+
+    The delay before retry N is min(cap, base * 2**N), scaled by a random
+    factor in [1 - jitter, 1 + jitter]. Exceptions outside retry_on are raised
+    immediately. If a breaker is given, it is checked before every attempt
+    (raising CircuitOpenError when open) and updated with each outcome.
+
+    Args:
+        fn: Zero-argument callable returning a fresh awaitable per attempt
+        attempts: Maximum number of attempts
+        base: Initial backoff delay in seconds
+        cap: Maximum backoff delay in seconds
+        jitter: Relative random jitter applied to each delay
+        retry_on: Exception types treated as transient
+        breaker: Optional circuit breaker guarding the downstream
+
+    Returns:
+        The result of the first successful call
+    """
+    for attempt in range(attempts):
+        if breaker is not None and not breaker.can_execute():
+            raise CircuitOpenError(f"Circuit open for {breaker.name}")
+
+        try:
+            result = await fn()
+        except retry_on as e:
+            if breaker is not None:
+                breaker.record_outcome(False)
+            if attempt == attempts - 1:
+                raise
+
+            delay = min(cap, base * 2 ** attempt) * (1 + random.uniform(-jitter, jitter))
+            logger.warning("   Attempt %d/%d failed (%r), retrying in %.2fs", attempt + 1, attempts, e, delay)
+            await asyncio.sleep(delay)
+        else:
+            if breaker is not None:
+                breaker.record_outcome(True)
+            return result
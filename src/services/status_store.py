@@ -0,0 +1,122 @@
+"""
+Analysis Status Store
+Tracks analysis job status in Redis, with a bounded in-memory fallback
+"""
+
+import logging
+from typing import Dict, Any, Optional
+
+import orjson
+from cachetools import TTLCache
+
+from config import settings
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "analysis:status:"
+
+# Fields every record exposes; fills gaps left by writes that went to a
+# different backend (e.g. a local fallback write during a Redis outage)
+RECORD_DEFAULTS: Dict[str, Any] = {
+    "status": "unknown",
+    "progress": None,
+    "started_at": None,
+    "completed_at": None,
+    "error": None,
+    "result": None,
+}
+
+# Small fields needed to list analyses, so listing never loads full results
+SUMMARY_FIELDS = ("status", "client_name", "started_at")
+
+
+class StatusStore:
+    """
+    Stores per-analysis status records.
+
+    Each record is a Redis hash of JSON-encoded fields that expires after
+    STATUS_TTL_SECONDS, so memory stays bounded and every API worker sees
+    the same status. Without Redis, or when a Redis write fails, records
+    live in a process-local LRU cache with the same TTL, capped at
+    STATUS_STORE_MAX_ENTRIES.
+    """
+
+    def __init__(self):
+        self.redis = None
+        self._local: TTLCache = TTLCache(
+            maxsize=settings.STATUS_STORE_MAX_ENTRIES,
+            ttl=settings.STATUS_TTL_SECONDS,
+        )
+
+        if settings.REDIS_URL and redis is not None:
+            self.redis = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+            logger.info("✅ Redis status store configured")
+        else:
+            logger.warning("⚠️  Redis not configured - using in-memory status store")
+
+    async def put(self, analysis_id: str, fields: Dict[str, Any]):
+        """Merge fields into an analysis record, refreshing its TTL"""
+        if self.redis is not None:
+            try:
+                key = KEY_PREFIX + analysis_id
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.hset(key, mapping={k: orjson.dumps(v) for k, v in fields.items()})
+                    pipe.expire(key, settings.STATUS_TTL_SECONDS)
+                    await pipe.execute()
+                return
+            except redis.RedisError as e:
+                logger.error("❌ Redis status write failed, using local store: %s", e)
+
+        record = self._local.get(analysis_id, {})
+        record.update(fields)
+        # Re-assigning refreshes both the TTL and the LRU position
+        self._local[analysis_id] = record
+
+    async def get(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """Return the analysis record, or None if unknown or expired"""
+        record = dict(self._local.get(analysis_id, {}))
+
+        if self.redis is not None:
+            try:
+                raw = await self.redis.hgetall(KEY_PREFIX + analysis_id)
+                record.update((k, orjson.loads(v)) for k, v in raw.items())
+            except redis.RedisError as e:
+                logger.error("❌ Redis status read failed, using local store: %s", e)
+
+        if not record:
+            return None
+        return {**RECORD_DEFAULTS, "analysis_id": analysis_id, **record}
+
+    async def all(self) -> Dict[str, Dict[str, Any]]:
+        """Return the SUMMARY_FIELDS of every known analysis, keyed by analysis ID"""
+        records = {
+            aid: {field: record.get(field) for field in SUMMARY_FIELDS}
+            for aid, record in self._local.items()
+        }
+
+        if self.redis is not None:
+            try:
+                async for key in self.redis.scan_iter(match=KEY_PREFIX + "*"):
+                    values = await self.redis.hmget(key, SUMMARY_FIELDS)
+                    summary = records.setdefault(key[len(KEY_PREFIX):], dict.fromkeys(SUMMARY_FIELDS))
+                    for field, value in zip(SUMMARY_FIELDS, values):
+                        if value is not None:
+                            summary[field] = orjson.loads(value)
+            except redis.RedisError as e:
+                logger.error("❌ Redis status scan failed: %s", e)
+
+        return records
+
+    async def close(self):
+        """Close the Redis connection pool"""
+        if self.redis is not None:
+            await self.redis.aclose()
+
+
+# Module-level instance
+status_store = StatusStore()
@@ -4,61 +4,101 @@ Supabase client for storing policy analysis results
 
 import logging
 from typing import Dict, Any, Optional
-from supabase import create_client, Client
+
+import httpx
+
 from config import settings
+from services.retry import retry_with_backoff, get_breaker
 
 logger = logging.getLogger(__name__)
 
 
 class SupabaseService:
-      """Service for interacting with Supabase database"""
+    """Service for interacting with Supabase database"""
 
     def __init__(self):
-              self.client: Optional[Client] = None
-              if settings.SUPABASE_URL and settings.SUPABASE_KEY:
-                            try:
-                                              self.client = create_client(
-                                                                    settings.SUPABASE_URL,
-                                                                    settings.SUPABASE_KEY
-                                                                )
-                                              logger.info("✅ Supabase client initialized")
-                                          except Exception as e:
-                                                            logger.error(f"❌ Failed to initialize Supabase client: {e}")
-                                                    else:
+        # PostgREST client, built on first write so idle workers hold no pool
+        self._client: Optional[httpx.AsyncClient] = None
+        if self.enabled:
+            logger.info("✅ Supabase configured")
+        else:
             logger.warning("⚠️  Supabase credentials not configured")
 
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.SUPABASE_URL and settings.SUPABASE_KEY)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Pooled keep-alive client for the Supabase REST API"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=f"{settings.SUPABASE_URL.rstrip('/')}/rest/v1",
+                headers={
+                    "apikey": settings.SUPABASE_KEY,
+                    "Authorization": f"Bearer {settings.SUPABASE_KEY}",
+                    "Content-Type": "application/json",
+                    "Prefer": "return=minimal",
+                },
+                timeout=settings.CALLBACK_TIMEOUT,
+            )
+        return self._client
 
     async def store_analysis_result(
-              self,
-              policy_id: str,
-              analysis_id: str,
-              analysis_data: Dict[str, Any],
-              status: str = "completed"
-          ) -> bool:
-                    """
-                            Store policy analysis results in Supabase.
-                                    This updates the policy record with analysis results.
-                                            """
-                    if not self.client:
-                                  logger.warning("Supabase client not initialized, skipping storage")
-                                  return False
-
-                    try:
-                                  # Update the policies table with analysis results
-                                  result = self.client.table("policies").update({
-                                                    "analysis_id": analysis_id,
-                                                    "analysis_status": status,
-                                                    "analysis_result": analysis_data,
-                                                    "analyzed_at": "now()"
-                                                }).eq("id", policy_id).execute()
-
-                        logger.info(f"✅ Stored analysis results for policy {policy_id}")
+        self,
+        policy_id: str,
+        analysis_id: str,
+        analysis_data: Dict[str, Any],
+        status: str = "completed"
+    ) -> bool:
+        """
+        Store policy analysis results in Supabase.
+        This updates the policy record with analysis results.
+        """
+        if not self.enabled:
+            logger.warning("Supabase client not initialized, skipping storage")
+            return False
+
+        async def _update():
+            # Update the policies table with analysis results
+            response = await self.client.patch(
+                "/policies",
+                params={"id": f"eq.{policy_id}"},
+                json={
+                    "analysis_id": analysis_id,
+                    "analysis_status": status,
+                    "analysis_result": analysis_data,
+                    "analyzed_at": "now()"
+                },
+            )
+            if response.status_code >= 500:
+                response.raise_for_status()
+            return response
+
+        try:
+            response = await retry_with_backoff(
+                _update,
+                retry_on=(httpx.TransportError, httpx.HTTPStatusError),
+                breaker=get_breaker("supabase"),
+            )
+
+            if not response.is_success:
+                logger.error("❌ Failed to store analysis result: %s %s", response.status_code, response.text)
+                return False
+
+            logger.info("✅ Stored analysis results for policy %s", policy_id)
             return True
 
         except Exception as e:
-            logger.error(f"❌ Failed to store analysis result: {e}")
+            logger.error("❌ Failed to store analysis result: %s", e)
             return False
 
+    async def close(self):
+        """Close the HTTP connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
 
 # Create a singleton instance
 supabase_service = SupabaseService()